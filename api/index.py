@@ -1,106 +1,210 @@
 from http.server import BaseHTTPRequestHandler
 import json
+import logging
 import urllib.parse
+import os
+import re
 import math
+import queue
+import threading
+import time
+import functools
+from array import array
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # orjson не установлен - используем стандартный json
+    orjson = None
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 # Простое хранилище
 players_db = {}
 rooms_db = {}
 room_counter = 1
 
+# Индекс участников: room_id -> множество telegram_id (хранится отдельно от комнаты,
+# чтобы в ответы API по-прежнему попадал только список members)
+room_member_ids = {}
+
+# Обратный индекс: creator telegram_id -> id созданной им комнаты
+creator_to_room = {}
+
 # Данные турниров
 tournaments_db = {}
-tournament_games = {}
+tournament_games = {}  # tournament_id -> TournamentGames
 tournament_counter = 0
 current_tournament = None
 
+# Агрегаты турнира, обновляемые при каждой завершенной игре:
+# tournament_id -> {telegram_id: {"games", "wins", "rating_change"}}
+tournament_stats = {}
+
+# Готовые JSON-ответы по турнирам; сбрасываются при любом изменении турнира
+tournament_data_cache = {}
+tournament_summary_cache = {}
+
+# Полная история игр турниров может дописываться в NDJSON-файл. Тогда в памяти
+# хранятся только последние TOURNAMENT_GAMES_WINDOW игр каждого турнира
+TOURNAMENT_LOG_PATH = os.getenv('TOURNAMENT_LOG_PATH')
+TOURNAMENT_LOG_BATCH = 64
+TOURNAMENT_GAMES_WINDOW = 1000
+tournament_log_queue = queue.Queue()
+
+# Сервер обрабатывает запросы в нескольких потоках - изменения общего состояния
+# (игроки, комнаты, турниры, счетчики) выполняются под одной блокировкой
+_state_lock = threading.Lock()
+
+def _dumps(obj):
+    """Сериализует ответ в JSON (UTF-8 байты)"""
+    if orjson is not None:
+        # rating_changes использует числовые telegram_id как ключи
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+def _loads(data):
+    """Разбирает тело запроса (байты) из JSON"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
 # Система рейтинга Glicko-2 для бадминтона
+DEFAULT_RD = 350
+DEFAULT_VOL = 0.06
+
+_THREE_OVER_PI2 = 3.0 / (math.pi ** 2)
+_INV_400 = 1.0 / 400.0
+
+@functools.lru_cache(maxsize=256)
+def _g(rd):
+    """Вычисляет g(RD); зависит только от RD, поэтому кэшируется"""
+    return 1.0 / math.sqrt(1.0 + _THREE_OVER_PI2 * rd * rd)
+
+# Все соперники сейчас считаются с RD = 350 - берем g без обращения к кэшу
+_G_350 = _g(DEFAULT_RD)
+
+# Ограничения итерационного поиска volatility: HTTP-обработчик не должен зависнуть
+_VOL_TOLERANCE = 0.000001
+_VOL_MAX_ITER = 100
+_VOL_DELTA_EPS = 1e-9
+
+def _solve_volatility(delta, rd2, vol, v, tau):
+    """Находит новую volatility методом Illinois с ограниченным числом итераций
+    При отсутствии сходимости возвращает последнее приближение
+    """
+    a = math.log(vol ** 2)
+    tau2 = tau * tau
+    # Не зависящие от x части f(x) считаются один раз до итераций
+    delta2_minus = delta * delta - rd2 - v
+    rd2_plus_v = rd2 + v
+    
+    def f(x):
+        ex = math.exp(x)
+        denom = rd2_plus_v + ex
+        return (ex * (delta2_minus - ex) / (2 * denom * denom)) - (x - a) / tau2
+    
+    # Начальный интервал, содержащий корень
+    A = a
+    if delta2_minus > 0:
+        B = math.log(delta2_minus)
+    else:
+        k = 1
+        while f(a - k * tau) < 0 and k < _VOL_MAX_ITER:
+            k += 1
+        B = a - k * tau
+    
+    fA = f(A)
+    fB = f(B)
+    
+    for _ in range(_VOL_MAX_ITER):
+        if abs(B - A) <= _VOL_TOLERANCE or fB == fA:
+            break
+        C = A + (A - B) * fA / (fB - fA)
+        fC = f(C)
+        if fC * fB < 0:
+            A = B
+            fA = fB
+        else:
+            fA = fA / 2
+        B = C
+        fB = fC
+    
+    return math.exp(A / 2)
+
+def _glicko2_update(rating, rd, vol, opp_ratings, opp_rds, scores, tau=0.5):
+    """Один шаг Glicko-2 для игрока
+    opp_ratings, opp_rds, scores: параллельные последовательности по соперникам
+    Возвращает кортеж (new_rating, new_rd, new_vol)
+    """
+    if not scores:
+        return rating, rd, vol
+    
+    # Шаги 1-2: v (variance) и delta за один проход, g и E считаются один раз на соперника
+    v = 0
+    delta = 0
+    for opp_rating, opp_rd, score in zip(opp_ratings, opp_rds, scores):
+        g = _G_350 if opp_rd == DEFAULT_RD else _g(opp_rd)
+        e = 1 / (1 + math.exp(-g * (rating - opp_rating) * _INV_400))
+        v += (g ** 2) * e * (1 - e)
+        delta += g * (score - e)
+    
+    if v == 0:
+        return rating, rd, vol
+    
+    v = 1 / v
+    delta *= v
+    
+    # Шаг 3: Обновляем volatility
+    if abs(delta) < _VOL_DELTA_EPS:
+        # Результат совпал с ожиданием - volatility не меняется, корень искать незачем
+        new_vol = vol
+    else:
+        new_vol = _solve_volatility(delta, rd ** 2, vol, v, tau)
+    
+    # Шаг 4: Обновляем RD
+    new_rd = math.sqrt(rd ** 2 + new_vol ** 2)
+    
+    # Шаг 5: Обновляем рейтинг
+    new_rating = rating + (new_rd ** 2) * delta
+    
+    return int(new_rating), int(new_rd), new_vol
+
+def glicko2_update(rating, rd, vol, results, tau=0.5):
+    """Обновляет рейтинг на основе результатов игр
+    results: список кортежей (opponent_rating, opponent_rd, score)
+    score: 1 за победу, 0 за поражение, 0.5 за ничью
+    Возвращает кортеж (new_rating, new_rd, new_vol)
+    """
+    if not results:
+        return rating, rd, vol
+    
+    opp_ratings, opp_rds, scores = zip(*results)
+    return _glicko2_update(rating, rd, vol, opp_ratings, opp_rds, scores, tau)
+
 class Glicko2Rating:
-    def __init__(self, rating=1500, rd=350, vol=0.06):
+    """Обертка над glicko2_update для внешнего кода; в расчете игр не используется"""
+    __slots__ = ('rating', 'rd', 'vol')
+    
+    def __init__(self, rating=1500, rd=DEFAULT_RD, vol=DEFAULT_VOL):
         self.rating = rating
         self.rd = rd  # Rating Deviation
         self.vol = vol  # Volatility
     
     def calculate_g(self, rd):
         """Вычисляет g(RD)"""
-        return 1 / math.sqrt(1 + (3 * (rd ** 2)) / (math.pi ** 2))
+        return _g(rd)
     
     def calculate_e(self, opponent_rating, opponent_rd):
         """Вычисляет E(s|r, rj, RDj)"""
         g = self.calculate_g(opponent_rd)
-        return 1 / (1 + math.exp(-g * (self.rating - opponent_rating) / 400))
+        return 1 / (1 + math.exp(-g * (self.rating - opponent_rating) * _INV_400))
     
     def update_rating(self, results, tau=0.5):
-        """Обновляет рейтинг на основе результатов игр
-        results: список кортежей (opponent_rating, opponent_rd, score)
-        score: 1 за победу, 0 за поражение, 0.5 за ничью
-        """
-        if not results:
-            return self.rating, self.rd, self.vol
-        
-        # Шаг 1: Вычисляем v (variance)
-        v = 0
-        for opp_rating, opp_rd, score in results:
-            g = self.calculate_g(opp_rd)
-            e = self.calculate_e(opp_rating, opp_rd)
-            v += (g ** 2) * e * (1 - e)
-        
-        if v == 0:
-            return self.rating, self.rd, self.vol
-        
-        v = 1 / v
-        
-        # Шаг 2: Вычисляем delta
-        delta = 0
-        for opp_rating, opp_rd, score in results:
-            g = self.calculate_g(opp_rd)
-            e = self.calculate_e(opp_rating, opp_rd)
-            delta += g * (score - e)
-        
-        delta *= v
-        
-        # Шаг 3: Обновляем volatility
-        a = math.log(self.vol ** 2)
-        
-        def f(x):
-            ex = math.exp(x)
-            return (ex * (delta ** 2 - self.rd ** 2 - v - ex) / 
-                   (2 * (self.rd ** 2 + v + ex) ** 2)) - (x - a) / (tau ** 2)
-        
-        # Простое приближение для нахождения корня
-        A = a
-        if delta ** 2 > self.rd ** 2 + v:
-            B = math.log(delta ** 2 - self.rd ** 2 - v)
-        else:
-            k = 1
-            while f(a - k * tau) < 0:
-                k += 1
-            B = a - k * tau
-        
-        fA = f(A)
-        fB = f(B)
-        
-        while abs(B - A) > 0.000001:
-            C = A + (A - B) * fA / (fB - fA)
-            fC = f(C)
-            if fC * fB < 0:
-                A = B
-                fA = fB
-            else:
-                fA = fA / 2
-            B = C
-            fB = fC
-        
-        new_vol = math.exp(A / 2)
-        
-        # Шаг 4: Обновляем RD
-        new_rd = math.sqrt(self.rd ** 2 + new_vol ** 2)
-        
-        # Шаг 5: Обновляем рейтинг
-        new_rating = self.rating + (new_rd ** 2) * delta
-        
-        return int(new_rating), int(new_rd), new_vol
+        """Обновляет рейтинг на основе результатов игр (см. glicko2_update)"""
+        return glicko2_update(self.rating, self.rd, self.vol, results, tau)
 
 def calculate_team_rating(players, is_winner):
     """Вычисляет командный рейтинг для 2v2"""
@@ -115,6 +219,31 @@ def calculate_team_rating(players, is_winner):
     
     return int(avg_rating + team_bonus)
 
+def update_rating_batch(ratings, rds, vols, opp_ratings, opp_rds, scores, tau=0.5):
+    """Обновляет рейтинги всех игроков одной игры за один вызов
+    Все аргументы - параллельные списки по игрокам; opp_ratings, opp_rds и scores
+    содержат для каждого игрока последовательность значений по его соперникам.
+    Обновления игроков независимы: все входные данные читаются до записи результатов,
+    а одинаковые входы (например, партнеры с равным рейтингом) считаются один раз.
+    Возвращает три списка: new_ratings, new_rds, new_vols
+    """
+    computed = {}
+    new_ratings = []
+    new_rds = []
+    new_vols = []
+    for i in range(len(ratings)):
+        key = (ratings[i], rds[i], vols[i], tuple(opp_ratings[i]), tuple(opp_rds[i]), tuple(scores[i]))
+        result = computed.get(key)
+        if result is None:
+            result = computed[key] = _glicko2_update(
+                ratings[i], rds[i], vols[i], opp_ratings[i], opp_rds[i], scores[i], tau
+            )
+        new_rating, new_rd, new_vol = result
+        new_ratings.append(new_rating)
+        new_rds.append(new_rd)
+        new_vols.append(new_vol)
+    return new_ratings, new_rds, new_vols
+
 def calculate_rating_changes(room_data, score_data):
     """Вычисляет изменения рейтинга после игры
     score_data: {'team1': [player_ids], 'team2': [player_ids], 'score1': int, 'score2': int}
@@ -122,6 +251,10 @@ def calculate_rating_changes(room_data, score_data):
     team1_players = [players_db[pid] for pid in score_data['team1'] if pid in players_db]
     team2_players = [players_db[pid] for pid in score_data['team2'] if pid in players_db]
     
+    # Игра без соперника не меняет рейтинг
+    if not team1_players or not team2_players:
+        return {}
+    
     score1 = score_data['score1']
     score2 = score_data['score2']
     
@@ -137,454 +270,538 @@ def calculate_rating_changes(room_data, score_data):
         team1_won = False
         team2_won = False
     
-    changes = {}
+    # Раскладываем игроков по столбцам: рейтинги читаются один раз до любых
+    # изменений, пересчет выполняется одним пакетом, затем результаты записываются обратно
+    players = team1_players + team2_players
+    teams = [1] * len(team1_players) + [2] * len(team2_players)
+    old_ratings = [player['rating'] for player in players]
     
-    # Обрабатываем команду 1
-    if team1_players:
-        team1_rating = calculate_team_rating(team1_players, team1_won)
-        
-        for player in team1_players:
-            glicko = Glicko2Rating(player['rating'], 350, 0.06)
-            
-            # Создаем результаты против команды 2
-            results = []
-            if team2_players:
-                team2_rating = calculate_team_rating(team2_players, team2_won)
-                score = 1 if team1_won else (0.5 if not team1_won and not team2_won else 0)
-                results.append((team2_rating, 350, score))
-            
-            new_rating, new_rd, new_vol = glicko.update_rating(results)
-            old_rating = player['rating']
-            rating_change = new_rating - old_rating
-            
-            changes[player['telegram_id']] = {
-                'old_rating': old_rating,
-                'new_rating': new_rating,
-                'rating_change': rating_change,
-                'team': 1,
-                'won': team1_won
-            }
-            
-            # Обновляем рейтинг в базе
-            player['rating'] = new_rating
+    # Рейтинг и результат каждой команды не зависят от конкретного игрока - считаем один раз
+    team1_rating = calculate_team_rating(team1_players, team1_won)
+    team2_rating = calculate_team_rating(team2_players, team2_won)
+    draw = not team1_won and not team2_won
+    team1_score = 1 if team1_won else (0.5 if draw else 0)
+    team2_score = 1 if team2_won else (0.5 if draw else 0)
+    
+    # Команда 1 играет против команды 2, команда 2 - против команды 1
+    opp_ratings = [(team2_rating,)] * len(team1_players) + [(team1_rating,)] * len(team2_players)
+    opp_scores = [(team1_score,)] * len(team1_players) + [(team2_score,)] * len(team2_players)
     
-    # Обрабатываем команду 2
-    if team2_players:
-        team2_rating = calculate_team_rating(team2_players, team2_won)
+    count = len(players)
+    new_ratings, _, _ = update_rating_batch(
+        old_ratings, [DEFAULT_RD] * count, [DEFAULT_VOL] * count,
+        opp_ratings, [(DEFAULT_RD,)] * count, opp_scores
+    )
+    
+    changes = {}
+    for player, team, old_rating, new_rating in zip(players, teams, old_ratings, new_ratings):
+        won = team1_won if team == 1 else team2_won
+        
+        changes[player['telegram_id']] = {
+            'old_rating': old_rating,
+            'new_rating': new_rating,
+            'rating_change': new_rating - old_rating,
+            'team': team,
+            'won': won
+        }
         
-        for player in team2_players:
-            glicko = Glicko2Rating(player['rating'], 350, 0.06)
-            
-            # Создаем результаты против команды 1
-            results = []
-            if team1_players:
-                team1_rating = calculate_team_rating(team1_players, team1_won)
-                score = 1 if team2_won else (0.5 if not team1_won and not team2_won else 0)
-                results.append((team1_rating, 350, score))
-            
-            new_rating, new_rd, new_vol = glicko.update_rating(results)
-            old_rating = player['rating']
-            rating_change = new_rating - old_rating
-            
-            changes[player['telegram_id']] = {
-                'old_rating': old_rating,
-                'new_rating': new_rating,
-                'rating_change': rating_change,
-                'team': 2,
-                'won': team2_won
-            }
-            
-            # Обновляем рейтинг в базе
-            player['rating'] = new_rating
+        # Обновляем рейтинг в базе
+        player['rating'] = new_rating
     
     return changes
 
+# Счет хранится в столбцах array('i')
+_MAX_SCORE = 2**31 - 1
+
+def _parse_score(value):
+    """Счет игры - целое число; true/false и дробные значения (21.5) отклоняются, а не округляются"""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"Недопустимый счет: {value!r}")
+    return int(value)
+
+class TournamentGames:
+    """Игры турнира в столбцовом виде: отдельный массив на каждое поле игры
+    max_games ограничивает число хранимых в памяти последних игр: столбцы работают
+    как кольцевой буфер, новая игра записывается на место самой старой
+    """
+    __slots__ = ('tournament_id', 'max_games', 'total', 'room_ids', 'scores1', 'scores2',
+                 'timestamps', 'teams1', 'teams2', 'rating_changes')
+    
+    def __init__(self, tournament_id, max_games=None):
+        self.tournament_id = tournament_id
+        self.max_games = max_games
+        self.total = 0  # Всего записано игр, включая вытесненные из памяти
+        self.room_ids = array('q')
+        self.scores1 = array('i')
+        self.scores2 = array('i')
+        self.timestamps = []
+        self.teams1 = []
+        self.teams2 = []
+        self.rating_changes = []
+    
+    def __len__(self):
+        return len(self.room_ids)
+    
+    def append(self, room_id, timestamp, team1, team2, score1, score2, rating_changes):
+        """Добавляет игру; при переполнении вытесняет самую старую
+        Значения готовятся до записи: ошибка типа не оставляет столбцы разной длины
+        """
+        values = (
+            array('q', (room_id,))[0],
+            array('i', (score1,))[0],
+            array('i', (score2,))[0],
+            timestamp,
+            tuple(team1),
+            tuple(team2),
+            rating_changes
+        )
+        columns = (self.room_ids, self.scores1, self.scores2, self.timestamps,
+                   self.teams1, self.teams2, self.rating_changes)
+        
+        if self.max_games is None or self.total < self.max_games:
+            for column, value in zip(columns, values):
+                column.append(value)
+        else:
+            slot = self.total % self.max_games
+            for column, value in zip(columns, values):
+                column[slot] = value
+        self.total += 1
+    
+    def row(self, i):
+        """Собирает игру i (0 - самая старая из хранимых) в словарь формата API"""
+        if self.max_games is not None:
+            i = (self.total - len(self) + i) % self.max_games
+        return {
+            "tournament_id": self.tournament_id,
+            "room_id": self.room_ids[i],
+            "timestamp": self.timestamps[i],
+            "team1": list(self.teams1[i]),
+            "team2": list(self.teams2[i]),
+            "score1": self.scores1[i],
+            "score2": self.scores2[i],
+            "rating_changes": self.rating_changes[i]
+        }
+    
+    def rows(self):
+        """Все хранимые игры в формате API"""
+        return [self.row(i) for i in range(len(self))]
+
+def tournament_log_writer():
+    """Фоновая запись завершенных игр в TOURNAMENT_LOG_PATH пачками до TOURNAMENT_LOG_BATCH"""
+    while True:
+        batch = [tournament_log_queue.get()]
+        while len(batch) < TOURNAMENT_LOG_BATCH:
+            try:
+                batch.append(tournament_log_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        try:
+            with open(TOURNAMENT_LOG_PATH, 'ab') as log_file:
+                log_file.write(b''.join(_dumps(game) + b'\n' for game in batch))
+        except OSError as e:
+            logger.error("❌ Ошибка записи истории турнира: %s", e)
+
+if TOURNAMENT_LOG_PATH:
+    threading.Thread(target=tournament_log_writer, name='tournament-log', daemon=True).start()
+
+# Ответ для неизвестного игрока отличается только id - остальная часть JSON собрана заранее
+_UNKNOWN_PLAYER_TAIL = b',' + _dumps({
+    "first_name": "Неизвестный",
+    "last_name": "Игрок",
+    "username": None,
+    "rating": 1500
+})[1:]
+
+# Готовые ответы / и /health: ключ - (число игроков, число комнат) и текущая секунда
+_root_response_cache = [None, b'']
+_health_response_cache = [None, b'']
+
+def invalidate_tournament_cache(tournament_id):
+    """Сбрасывает готовые ответы турнира после его изменения"""
+    tournament_data_cache.pop(tournament_id, None)
+    tournament_summary_cache.pop(tournament_id, None)
+
 class handler(BaseHTTPRequestHandler):
+    # Все ответы содержат Content-Length, поэтому соединение можно держать открытым
+    protocol_version = 'HTTP/1.1'
+    
     def do_GET(self):
         """Обработка GET запросов"""
-        path = self.path.split('?')[0]
+        self.dispatch('GET')
+    
+    def do_POST(self):
+        """Обработка POST запросов"""
+        self.dispatch('POST')
+    
+    def do_DELETE(self):
+        """Обработка DELETE запросов"""
+        self.dispatch('DELETE')
+    
+    def dispatch(self, method):
+        """Находит обработчик в таблице маршрутов и отправляет его ответ"""
+        # Тело читается из сокета до блокировки: медленный клиент не задерживает остальных
+        path = self.path.partition('?')[0]
+        try:
+            data = self.read_json_body()
+        except Exception as e:
+            # Тело могло остаться непрочитанным - соединение нельзя переиспользовать
+            self.close_connection = True
+            self.send_json(500, _dumps({"error": str(e)}))
+            return
+        logger.debug("🔍 %s запрос: %s, data: %s", method, path, data)
+        
+        with _state_lock:
+            try:
+                for pattern, route in ROUTES_BY_METHOD.get(method, ()):
+                    match = pattern.match(path)
+                    if match:
+                        # id из пути разбираются один раз, через группы регулярного выражения
+                        status, response = route(self, data, *map(int, match.groups()))
+                        break
+                else:
+                    status, response = 404, {"error": "Endpoint not found"}
+                
+            except Exception as e:
+                status, response = 500, {"error": str(e)}
+            
+            # Сериализуем под блокировкой: ответ ссылается на общие словари
+            body = response if isinstance(response, bytes) else _dumps(response)
         
-        # CORS заголовки
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
+        self.send_json(status, body)
+    
+    def send_json(self, status, body):
+        """Отправляет статус, заголовки с известной длиной и тело ответа"""
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_cors_headers()
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_cors_headers(self):
+        """CORS заголовки"""
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+    
+    def log_request(self, code='-', size='-'):
+        """Журнал доступа через logging (DEBUG) вместо записи в stderr на каждый запрос"""
+        logger.debug('%s - "%s" %s %s', self.address_string(), self.requestline, code, size)
+    
+    def log_error(self, format, *args):
+        """Ошибки разбора запросов (битая стартовая строка, 400 от сервера) остаются видимыми"""
+        logger.warning("%s - " + format, self.address_string(), *args)
+    
+    def read_json_body(self):
+        """Читает JSON из тела запроса; пустое тело - пустой словарь"""
+        content_length_str = self.headers.get('Content-Length')
+        content_length = int(content_length_str) if content_length_str else 0
+        if content_length > 0:
+            post_data = self.rfile.read(content_length)
+            return _loads(post_data)
+        return {}
+    
+    def get_root(self, data):
+        """Информация об API"""
+        key = (len(players_db), len(rooms_db))
+        if _root_response_cache[0] != key:
+            _root_response_cache[:] = [key, _dumps({
+                "message": "🏸 Badminton Rating API",
+                "version": "1.0.0",
+                "status": "active",
+                "database": "memory",
+                "players": key[0],
+                "rooms": key[1]
+            })]
+        return 200, _root_response_cache[1]
+    
+    def get_health(self, data):
+        """Проверка состояния"""
+        second = int(time.time())
+        if _health_response_cache[0] != second:
+            _health_response_cache[:] = [second, _dumps({
+                "status": "healthy",
+                "timestamp": datetime.now().isoformat()
+            })]
+        return 200, _health_response_cache[1]
+    
+    def get_rooms(self, data):
+        """Возвращает все активные комнаты"""
+        return 200, [room for room in rooms_db.values() if room.get("is_active", True)]
+    
+    def get_room(self, data, room_id):
+        """Получение конкретной комнаты"""
+        if room_id in rooms_db:
+            return 200, rooms_db[room_id]
+        return 404, {"error": "Комната не найдена"}
+    
+    def get_player(self, data, telegram_id):
+        """Получение игрока"""
+        if telegram_id in players_db:
+            return 200, players_db[telegram_id]
+        return 200, b'{"id":%d,"telegram_id":%d' % (telegram_id, telegram_id) + _UNKNOWN_PLAYER_TAIL
+    
+    def create_player(self, data):
+        """Создание/обновление игрока"""
+        if 'telegram_id' not in data:
+            return 400, {"error": "telegram_id required"}
+        
+        telegram_id = data['telegram_id']
+        player = {
+            "id": telegram_id,
+            "telegram_id": telegram_id,
+            "first_name": data['first_name'],
+            "last_name": data.get('last_name'),
+            "username": data.get('username'),
+            "rating": 1500
+        }
+        players_db[telegram_id] = player
+        return 200, player
+    
+    def create_room(self, data):
+        """Создание комнаты"""
+        global room_counter
         
-        try:
-            if path == '/':
-                response = {
-                    "message": "🏸 Badminton Rating API",
-                    "version": "1.0.0",
-                    "status": "active",
-                    "database": "memory",
-                    "players": len(players_db),
-                    "rooms": len(rooms_db)
-                }
-                
-            elif path == '/health':
-                response = {
-                    "status": "healthy",
-                    "timestamp": datetime.now().isoformat()
+        if 'creator_telegram_id' not in data:
+            return 400, {"error": "creator_telegram_id required"}
+        
+        creator_id = data['creator_telegram_id']
+        
+        # ПРОВЕРЯЕМ НЕ СОЗДАЛ ЛИ УЖЕ КОМНАТУ
+        existing_room = creator_to_room.get(creator_id)
+        
+        if existing_room is not None:
+            return 400, {"error": f"Вы уже создали комнату #{existing_room}. Можно создать только одну комнату."}
+        
+        # Создаем игрока если его нет
+        if creator_id not in players_db:
+            players_db[creator_id] = {
+                "id": creator_id,
+                "telegram_id": creator_id,
+                "first_name": "Игрок",
+                "last_name": f"{creator_id}",
+                "username": None,
+                "rating": 1500
+            }
+        
+        creator = players_db[creator_id]
+        now_iso = datetime.now().isoformat()
+        creator_full_name = f"{creator['first_name']} {creator.get('last_name', '')}".strip()
+        
+        # Создаем комнату
+        new_room = {
+            "id": room_counter,
+            "name": data['name'],
+            "creator_id": creator_id,
+            "creator_full_name": creator_full_name,
+            "max_players": data.get('max_players', 4),
+            "member_count": 1,
+            "is_active": True,
+            "created_at": now_iso,
+            "members": [
+                {
+                    "id": 1,
+                    "player": creator,
+                    "is_leader": True,
+                    "joined_at": now_iso
                 }
-                
-            elif path == '/rooms/':
-                # Возвращаем все комнаты
-                active_rooms = [room for room in rooms_db.values() if room.get("is_active", True)]
-                response = active_rooms
-                
-            elif path.startswith('/rooms/') and path != '/rooms/':
-                # Получение конкретной комнаты
-                room_id = int(path.split('/')[-1])
-                if room_id in rooms_db:
-                    response = rooms_db[room_id]
-                else:
-                    self.send_response(404)
-                    response = {"error": "Комната не найдена"}
-                    
-            elif path.startswith('/players/'):
-                # Получение игрока
-                telegram_id = int(path.split('/')[-1])
-                if telegram_id in players_db:
-                    response = players_db[telegram_id]
-                else:
-                    response = {
-                        "id": telegram_id,
-                        "telegram_id": telegram_id,
-                        "first_name": "Неизвестный",
-                        "last_name": "Игрок",
-                        "username": None,
-                        "rating": 1500
-                    }
-            else:
-                self.send_response(404)
-                response = {"error": "Endpoint not found"}
-                
-        except Exception as e:
-            self.send_response(500)
-            response = {"error": str(e)}
+            ]
+        }
         
-        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        rooms_db[room_counter] = new_room
+        room_member_ids[room_counter] = {creator_id}
+        creator_to_room[creator_id] = room_counter
+        room_counter += 1
+        return 200, new_room
     
-    def do_POST(self):
-        """Обработка POST запросов"""
-        global room_counter
+    def join_room(self, data, room_id):
+        """Присоединение к комнате"""
+        telegram_id = data['telegram_id']
+        first_name = data.get('first_name', 'Игрок')
+        last_name = data.get('last_name', '')
+        username = data.get('username')
+        
+        if room_id not in rooms_db:
+            return 404, {"error": "Комната не найдена"}
+        
+        room = rooms_db[room_id]
+        
+        # Проверяем не присоединился ли уже
+        member_ids = room_member_ids.setdefault(room_id, set())
+        
+        if telegram_id in member_ids:
+            return 200, {"message": "Вы уже в комнате", "room": room}
+        
+        if len(room['members']) >= room['max_players']:
+            return 400, {"error": "Комната заполнена"}
+        
+        # Создаем/обновляем игрока
+        if telegram_id not in players_db:
+            players_db[telegram_id] = {
+                "id": telegram_id,
+                "telegram_id": telegram_id,
+                "first_name": first_name,
+                "last_name": last_name,
+                "username": username,
+                "rating": 1500
+            }
+        else:
+            # Обновляем данные игрока
+            players_db[telegram_id].update({
+                "first_name": first_name,
+                "last_name": last_name,
+                "username": username
+            })
+        
+        player = players_db[telegram_id]
+        
+        # Добавляем игрока в комнату
+        new_member = {
+            "id": len(room['members']) + 1,
+            "player": player,
+            "is_leader": False,
+            "joined_at": datetime.now().isoformat()
+        }
         
-        # CORS заголовки
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        room['members'].append(new_member)
+        room['member_count'] = len(room['members'])
+        member_ids.add(telegram_id)
         
-        try:
-            content_length_str = self.headers.get('Content-Length')
-            content_length = int(content_length_str) if content_length_str else 0
-            if content_length > 0:
-                post_data = self.rfile.read(content_length)
-                data = json.loads(post_data.decode('utf-8'))
-            else:
-                data = {}
+        # Обновляем комнату в базе
+        rooms_db[room_id] = room
+        
+        return 200, {
+            "message": "Успешно присоединились к комнате",
+            "room": room,
+            "member": new_member
+        }
+    
+    def leave_room(self, data, room_id):
+        """Выход из комнаты"""
+        telegram_id = data['telegram_id']
+        
+        if room_id not in rooms_db:
+            return 404, {"error": "Комната не найдена"}
+        
+        room = rooms_db[room_id]
+        member_ids = room_member_ids.setdefault(room_id, set())
+        
+        if telegram_id not in member_ids:
+            return 400, {"error": "Вы не состоите в этой комнате"}
+        
+        # Находим и удаляем участника
+        member_to_remove = next(
+            i for i, member in enumerate(room['members'])
+            if member['player']['telegram_id'] == telegram_id
+        )
+        removed_member = room['members'].pop(member_to_remove)
+        room['member_count'] = len(room['members'])
+        member_ids.discard(telegram_id)
+        
+        # ЕСЛИ СОЗДАТЕЛЬ ПОКИДАЕТ КОМНАТУ - РАСФОРМИРОВЫВАЕМ ПОЛНОСТЬЮ
+        if room['creator_id'] == telegram_id:
+            # Создаем список участников для уведомления
+            remaining_members = [member['player']['telegram_id'] for member in room['members']]
             
-            path = self.path.split('?')[0]
-            print(f"🔍 POST запрос: {path}, data: {data}")
+            # Удаляем комнату полностью
+            del rooms_db[room_id]
+            room_member_ids.pop(room_id, None)
+            creator_to_room.pop(telegram_id, None)
             
-            if path == '/players/':
-                # Создание/обновление игрока
-                if 'telegram_id' not in data:
-                    self.send_response(400)
-                    response = {"error": "telegram_id required"}
-                else:
-                    telegram_id = data['telegram_id']
-                    player = {
-                        "id": telegram_id,
-                        "telegram_id": telegram_id,
-                        "first_name": data['first_name'],
-                        "last_name": data.get('last_name'),
-                        "username": data.get('username'),
-                        "rating": 1500
-                    }
-                    players_db[telegram_id] = player
-                    response = player
-                
-            elif path == '/rooms/':
-                # Создание комнаты
-                if 'creator_telegram_id' not in data:
-                    self.send_response(400)
-                    response = {"error": "creator_telegram_id required"}
-                else:
-                    creator_id = data['creator_telegram_id']
-                    
-                    # ПРОВЕРЯЕМ НЕ СОЗДАЛ ЛИ УЖЕ КОМНАТУ
-                    existing_room = None
-                    for room_id, room in rooms_db.items():
-                        if room['creator_id'] == creator_id:
-                            existing_room = room_id
-                            break
-                    
-                    if existing_room:
-                        self.send_response(400)
-                        response = {"error": f"Вы уже создали комнату #{existing_room}. Можно создать только одну комнату."}
-                    else:
-                        # Создаем игрока если его нет
-                        if creator_id not in players_db:
-                            players_db[creator_id] = {
-                                "id": creator_id,
-                                "telegram_id": creator_id,
-                                "first_name": "Игрок",
-                                "last_name": f"{creator_id}",
-                                "username": None,
-                                "rating": 1500
-                            }
-                    
-                        creator = players_db[creator_id]
-                        creator_full_name = f"{creator['first_name']} {creator.get('last_name', '')}".strip()
-                        
-                        # Создаем комнату
-                        new_room = {
-                            "id": room_counter,
-                            "name": data['name'],
-                            "creator_id": creator_id,
-                            "creator_full_name": creator_full_name,
-                            "max_players": data.get('max_players', 4),
-                            "member_count": 1,
-                            "is_active": True,
-                            "created_at": datetime.now().isoformat(),
-                            "members": [
-                                {
-                                    "id": 1,
-                                    "player": creator,
-                                    "is_leader": True,
-                                    "joined_at": datetime.now().isoformat()
-                                }
-                            ]
-                        }
-                        
-                        rooms_db[room_counter] = new_room
-                        room_counter += 1
-                        response = new_room
-                
-            elif path.startswith('/rooms/') and path.endswith('/join'):
-                # Присоединение к комнате
-                room_id = int(path.split('/')[-2])
-                telegram_id = data['telegram_id']
-                first_name = data.get('first_name', 'Игрок')
-                last_name = data.get('last_name', '')
-                username = data.get('username')
-                
-                if room_id not in rooms_db:
-                    self.send_response(404)
-                    response = {"error": "Комната не найдена"}
-                else:
-                    room = rooms_db[room_id]
-                    
-                    # Проверяем не присоединился ли уже
-                    already_joined = any(member['player']['telegram_id'] == telegram_id for member in room['members'])
-                    
-                    if already_joined:
-                        response = {"message": "Вы уже в комнате", "room": room}
-                    elif len(room['members']) >= room['max_players']:
-                        self.send_response(400)
-                        response = {"error": "Комната заполнена"}
-                    else:
-                        # Создаем/обновляем игрока
-                        if telegram_id not in players_db:
-                            players_db[telegram_id] = {
-                                "id": telegram_id,
-                                "telegram_id": telegram_id,
-                                "first_name": first_name,
-                                "last_name": last_name,
-                                "username": username,
-                                "rating": 1500
-                            }
-                        else:
-                            # Обновляем данные игрока
-                            players_db[telegram_id].update({
-                                "first_name": first_name,
-                                "last_name": last_name,
-                                "username": username
-                            })
-                        
-                        player = players_db[telegram_id]
-                        
-                        # Добавляем игрока в комнату
-                        new_member = {
-                            "id": len(room['members']) + 1,
-                            "player": player,
-                            "is_leader": False,
-                            "joined_at": datetime.now().isoformat()
-                        }
-                        
-                        room['members'].append(new_member)
-                        room['member_count'] = len(room['members'])
-                        
-                        # Обновляем комнату в базе
-                        rooms_db[room_id] = room
-                        
-                        response = {
-                            "message": "Успешно присоединились к комнате",
-                            "room": room,
-                            "member": new_member
-                        }
-                        
-            elif path.startswith('/rooms/') and path.endswith('/leave'):
-                # Выход из комнаты
-                room_id = int(path.split('/')[-2])
-                telegram_id = data['telegram_id']
-                
-                if room_id not in rooms_db:
-                    self.send_response(404)
-                    response = {"error": "Комната не найдена"}
-                else:
-                    room = rooms_db[room_id]
-                    
-                    # Находим участника для удаления
-                    member_to_remove = None
-                    for i, member in enumerate(room['members']):
-                        if member['player']['telegram_id'] == telegram_id:
-                            member_to_remove = i
-                            break
-                    
-                    if member_to_remove is not None:
-                        # Удаляем участника
-                        removed_member = room['members'].pop(member_to_remove)
-                        room['member_count'] = len(room['members'])
-                        
-                        # ЕСЛИ СОЗДАТЕЛЬ ПОКИДАЕТ КОМНАТУ - РАСФОРМИРОВЫВАЕМ ПОЛНОСТЬЮ
-                        if room['creator_id'] == telegram_id:
-                            # Создаем список участников для уведомления
-                            remaining_members = [member['player']['telegram_id'] for member in room['members']]
-                            
-                            # Удаляем комнату полностью
-                            del rooms_db[room_id]
-                            
-                            response = {
-                                "message": "Комната расформирована",
-                                "room_disbanded": True,
-                                "affected_members": remaining_members
-                            }
-                        elif len(room['members']) == 0:
-                            # Если комната пуста - удаляем её
-                            del rooms_db[room_id]
-                            response = {"message": "Вы покинули комнату. Комната удалена."}
-                        else:
-                            # Обычный выход участника
-                            rooms_db[room_id] = room
-                            response = {
-                                "message": "Вы покинули комнату",
-                                "room": room,
-                                "removed_member": removed_member
-                            }
-                    else:
-                        self.send_response(400)
-                        response = {"error": "Вы не состоите в этой комнате"}
-                
-            else:
-                self.send_response(404)
-                response = {"error": "Endpoint not found"}
-                
-        except Exception as e:
-            self.send_response(500)
-            response = {"error": str(e)}
+            return 200, {
+                "message": "Комната расформирована",
+                "room_disbanded": True,
+                "affected_members": remaining_members
+            }
         
-        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        if len(room['members']) == 0:
+            # Если комната пуста - удаляем её
+            del rooms_db[room_id]
+            room_member_ids.pop(room_id, None)
+            creator_to_room.pop(room['creator_id'], None)
+            return 200, {"message": "Вы покинули комнату. Комната удалена."}
+        
+        # Обычный выход участника
+        rooms_db[room_id] = room
+        return 200, {
+            "message": "Вы покинули комнату",
+            "room": room,
+            "removed_member": removed_member
+        }
     
-    def do_DELETE(self):
-        """Обработка DELETE запросов"""
-        # CORS заголовки
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+    def delete_room(self, data, room_id):
+        """Удаление комнаты"""
+        if room_id not in rooms_db:
+            return 404, {"error": "Комната не найдена"}
+        
+        room = rooms_db.pop(room_id)
+        room_member_ids.pop(room_id, None)
+        creator_to_room.pop(room['creator_id'], None)
+        return 200, {"message": "Комната успешно удалена"}
+    
+    def finish_game(self, data, room_id):
+        """Завершение игры и подсчет рейтинга"""
+        if room_id not in rooms_db:
+            return 404, {"error": "Комната не найдена"}
+        
+        room = rooms_db[room_id]
         
+        # Проверяем что в комнате 2 или 4 игрока
+        if len(room['members']) not in [2, 4]:
+            return 400, {"error": "Для завершения игры нужно 2 или 4 игрока"}
+        
+        # Счет и составы проверяются до любых изменений рейтингов и турнира
         try:
-            path = self.path.split('?')[0]
+            score_data = {
+                'team1': list(data['team1']),
+                'team2': list(data['team2']),
+                'score1': _parse_score(data['score1']),
+                'score2': _parse_score(data['score2'])
+            }
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return 400, {"error": "Нужны team1, team2 и целые score1, score2"}
+        if not (0 <= score_data['score1'] <= _MAX_SCORE and 0 <= score_data['score2'] <= _MAX_SCORE):
+            return 400, {"error": "Недопустимый счет"}
+        
+        # Вычисляем изменения рейтинга
+        rating_changes = calculate_rating_changes(room, score_data)
+        now_iso = datetime.now().isoformat()
+        
+        # Обновляем комнату - игра завершена
+        room['game_finished'] = True
+        room['final_score'] = {
+            'team1': score_data['score1'],
+            'team2': score_data['score2']
+        }
+        room['rating_changes'] = rating_changes
+        room['finished_at'] = now_iso
+        
+        # Записываем игру в турнир, если он активен
+        if current_tournament is not None:
+            games = tournament_games[current_tournament]
+            games.append(
+                room_id, now_iso, score_data['team1'], score_data['team2'],
+                score_data['score1'], score_data['score2'], rating_changes
+            )
+            if TOURNAMENT_LOG_PATH:
+                tournament_log_queue.put_nowait(games.row(len(games) - 1))
             
-            if path.startswith('/rooms/') and path != '/rooms/':
-                room_id = int(path.split('/')[-1])
-                if room_id in rooms_db:
-                    del rooms_db[room_id]
-                    response = {"message": "Комната успешно удалена"}
-                else:
-                    self.send_response(404)
-                    response = {"error": "Комната не найдена"}
-                    
-            elif path.startswith('/rooms/') and path.endswith('/finish-game'):
-                # Завершение игры и подсчет рейтинга
-                room_id = int(path.split('/')[-2])
-                
-                if room_id not in rooms_db:
-                    self.send_response(404)
-                    response = {"error": "Комната не найдена"}
-                else:
-                    room = rooms_db[room_id]
-                    
-                    # Проверяем что в комнате 2 или 4 игрока
-                    if len(room['members']) not in [2, 4]:
-                        self.send_response(400)
-                        response = {"error": "Для завершения игры нужно 2 или 4 игрока"}
-                    else:
-                        # Получаем данные счета
-                        score_data = data
-                        
-                        # Вычисляем изменения рейтинга
-                        rating_changes = calculate_rating_changes(room, score_data)
-                        
-                        # Обновляем комнату - игра завершена
-                        room['game_finished'] = True
-                        room['final_score'] = {
-                            'team1': score_data['score1'],
-                            'team2': score_data['score2']
-                        }
-                        room['rating_changes'] = rating_changes
-                        room['finished_at'] = datetime.now().isoformat()
-                        
-                        # Записываем игру в турнир, если он активен
-                        if current_tournament is not None:
-                            game_data = {
-                                "tournament_id": current_tournament,
-                                "room_id": room_id,
-                                "timestamp": datetime.now().isoformat(),
-                                "team1": score_data['team1'],
-                                "team2": score_data['team2'],
-                                "score1": score_data['score1'],
-                                "score2": score_data['score2'],
-                                "rating_changes": rating_changes
-                            }
-                            tournament_games[current_tournament].append(game_data)
-                        
-                        response = {
-                            "message": "Игра завершена!",
-                            "room": room,
-                            "rating_changes": rating_changes
-                        }
-                        
-            elif path == '/tournament/start':
-                # Начать турнир
-                response = self.start_tournament()
-            elif path == '/tournament/end':
-                # Завершить турнир
-                response = self.end_tournament()
-            elif path.startswith('/tournament/'):
-                # Получение данных турнира
-                tournament_id = int(path.split('/')[-1])
-                response = self.get_tournament_data(tournament_id)
-                        
-            else:
-                self.send_response(404)
-                response = {"error": "Endpoint not found"}
-                
-        except Exception as e:
-            self.send_response(500)
-            response = {"error": str(e)}
-        
-        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            stats = tournament_stats[current_tournament]
+            for telegram_id, change in rating_changes.items():
+                player_stats = stats.setdefault(telegram_id, {"games": 0, "wins": 0, "rating_change": 0})
+                player_stats["games"] += 1
+                player_stats["wins"] += 1 if change['won'] else 0
+                player_stats["rating_change"] += change['rating_change']
+            invalidate_tournament_cache(current_tournament)
+        
+        return 200, {
+            "message": "Игра завершена!",
+            "room": room,
+            "rating_changes": rating_changes
+        }
     
-    def start_tournament(self):
+    def start_tournament(self, data=None):
         """Начать турнир"""
         global tournament_counter, current_tournament
         
@@ -597,56 +814,105 @@ class handler(BaseHTTPRequestHandler):
             "status": "active"
         }
         
-        tournament_games[current_tournament] = []
+        tournament_games[current_tournament] = TournamentGames(
+            current_tournament, TOURNAMENT_GAMES_WINDOW if TOURNAMENT_LOG_PATH else None
+        )
+        tournament_stats[current_tournament] = {}
         
-        return {
+        return 200, {
             "message": f"Турнир #{current_tournament} начат!",
             "tournament_id": current_tournament
         }
     
-    def end_tournament(self):
+    def end_tournament(self, data=None):
         """Завершить турнир"""
         global current_tournament
         
         if current_tournament is None:
-            return {"error": "Нет активного турнира"}
+            return 400, {"error": "Нет активного турнира"}
         
         tournament_id = current_tournament
         tournaments_db[tournament_id]["status"] = "finished"
         tournaments_db[tournament_id]["end_time"] = datetime.now().isoformat()
+        invalidate_tournament_cache(tournament_id)
         
         current_tournament = None
         
-        return {
+        return 200, {
             "message": f"Турнир #{tournament_id} завершен!",
             "tournament_id": tournament_id
         }
     
-    def get_tournament_data(self, tournament_id):
+    def get_tournament_data(self, data, tournament_id):
         """Получить данные турнира"""
         if tournament_id not in tournaments_db:
-            return {"error": "Турнир не найден"}
+            return 404, {"error": "Турнир не найден"}
         
-        tournament = tournaments_db[tournament_id]
-        games = tournament_games.get(tournament_id, [])
-        
-        return {
-            "tournament_id": tournament_id,
-            "tournament": tournament,
-            "games": games,
-            "message": f"Данные турнира #{tournament_id}"
-        }
+        body = tournament_data_cache.get(tournament_id)
+        if body is None:
+            tournament = tournaments_db[tournament_id]
+            games = tournament_games[tournament_id].rows() if tournament_id in tournament_games else []
+            
+            body = tournament_data_cache[tournament_id] = _dumps({
+                "tournament_id": tournament_id,
+                "tournament": tournament,
+                "games": games,
+                "message": f"Данные турнира #{tournament_id}"
+            })
+        
+        return 200, body
+    
+    def get_tournament_summary(self, data, tournament_id):
+        """Получить сводку турнира без списка игр"""
+        if tournament_id not in tournaments_db:
+            return 404, {"error": "Турнир не найден"}
+        
+        body = tournament_summary_cache.get(tournament_id)
+        if body is None:
+            body = tournament_summary_cache[tournament_id] = _dumps({
+                "tournament_id": tournament_id,
+                "tournament": tournaments_db[tournament_id],
+                "games_count": tournament_games[tournament_id].total if tournament_id in tournament_games else 0,
+                "players": tournament_stats.get(tournament_id, {}),
+                "message": f"Сводка турнира #{tournament_id}"
+            })
+        
+        return 200, body
     
     def do_OPTIONS(self):
         """Обработка OPTIONS запросов для CORS"""
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
+        self.send_cors_headers()
         self.end_headers()
 
+# Таблица маршрутов: (метод, шаблон пути, обработчик)
+# Числовые группы шаблона передаются обработчику после тела запроса
+ROUTES = [
+    ('GET', re.compile(r'^/$'), handler.get_root),
+    ('GET', re.compile(r'^/health$'), handler.get_health),
+    ('GET', re.compile(r'^/rooms/$'), handler.get_rooms),
+    ('GET', re.compile(r'^/rooms/(\d+)$'), handler.get_room),
+    ('GET', re.compile(r'^/players/(\d+)$'), handler.get_player),
+    ('POST', re.compile(r'^/players/$'), handler.create_player),
+    ('POST', re.compile(r'^/rooms/$'), handler.create_room),
+    ('POST', re.compile(r'^/rooms/(\d+)/join$'), handler.join_room),
+    ('POST', re.compile(r'^/rooms/(\d+)/leave$'), handler.leave_room),
+    ('DELETE', re.compile(r'^/rooms/(\d+)$'), handler.delete_room),
+    ('DELETE', re.compile(r'^/rooms/(\d+)/finish-game$'), handler.finish_game),
+    ('DELETE', re.compile(r'^/tournament/start$'), handler.start_tournament),
+    ('DELETE', re.compile(r'^/tournament/end$'), handler.end_tournament),
+    ('DELETE', re.compile(r'^/tournament/(\d+)$'), handler.get_tournament_data),
+    ('GET', re.compile(r'^/tournament/(\d+)/summary$'), handler.get_tournament_summary),
+]
+
+# Маршруты, сгруппированные по методу: запрос проверяет только шаблоны своего метода
+ROUTES_BY_METHOD = {}
+for _method, _pattern, _route in ROUTES:
+    ROUTES_BY_METHOD.setdefault(_method, []).append((_pattern, _route))
+
 if __name__ == '__main__':
-    from http.server import HTTPServer
-    server = HTTPServer(('localhost', 8000), handler)
+    from http.server import ThreadingHTTPServer
+    server = ThreadingHTTPServer(('localhost', 8000), handler)
     print('🚀 API сервер запущен на http://localhost:8000')
     server.serve_forever()
\ No newline at end of file
@@ -1,23 +1,122 @@
 import os
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+import secrets
+import asyncpg
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, ForeignKey, Text
+from fastapi.encoders import jsonable_encoder
+from fastapi_cache import FastAPICache
+from fastapi_cache.coder import Coder, JsonCoder
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.decorator import cache
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Index, select, delete, text, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session, relationship
+from sqlalchemy.orm import relationship, selectinload, joinedload, raiseload
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from datetime import datetime
-from pydantic import BaseModel
+from uuid import uuid4
+from pydantic import BaseModel, ConfigDict, computed_field
 from typing import List, Optional
 import logging
 
-# Настройка логирования
+try:
+    import orjson
+except ImportError:  # orjson не установлен - кэш кодируется стандартным json
+    orjson = None
+
+# Настройка логирования: в продакшене по умолчанию только предупреждения и ошибки (LOG_LEVEL=INFO для отладки).
+# Сообщения форматируются через %-аргументы - отфильтрованные записи не собираются в строки
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("LOG_LEVEL", "WARNING").upper())
+
+# Кэш ответов: Redis при заданном REDIS_URL, иначе память процесса
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Telegram-бот получает обновления вебхуком {PUBLIC_URL}/tg/webhook, если задан PUBLIC_URL.
+# Без WEBHOOK_SECRET бот не запускается: иначе кто угодно может прислать поддельное обновление
+PUBLIC_URL = os.getenv("PUBLIC_URL")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+BOT_START_TIMEOUT = 30
+telegram_bot = None
+
+class ORJsonCoder(Coder):
+    """Кодирует закэшированные ответы через orjson"""
+    
+    @classmethod
+    def encode(cls, value):
+        return orjson.dumps(value, default=jsonable_encoder)
+    
+    @classmethod
+    def decode(cls, value):
+        return orjson.loads(value)
+
+CACHE_CODER = ORJsonCoder if orjson else JsonCoder
+
+@asynccontextmanager
+async def lifespan(app):
+    if REDIS_URL:
+        from fastapi_cache.backends.redis import RedisBackend
+        from redis import asyncio as aioredis
+        FastAPICache.init(RedisBackend(aioredis.from_url(REDIS_URL)), prefix="badminton", coder=CACHE_CODER)
+    else:
+        FastAPICache.init(InMemoryBackend(), prefix="badminton", coder=CACHE_CODER)
+    
+    # Создание таблиц
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        logger.info("✅ Таблицы созданы успешно")
+    except Exception as e:
+        logger.error("❌ Ошибка создания таблиц: %s", e)
+    
+    # Прямой пул asyncpg для горячего списка комнат
+    global pg_pool
+    if DATABASE_URL.startswith("postgresql://"):
+        try:
+            pg_pool = await asyncpg.create_pool(
+                DATABASE_URL,
+                min_size=RAW_POOL_MIN_SIZE,
+                max_size=RAW_POOL_MAX_SIZE,
+                statement_cache_size=STATEMENT_CACHE_SIZE
+            )
+        except Exception as e:
+            logger.error("❌ Ошибка создания пула asyncpg: %s", e)
+    
+    global telegram_bot
+    if PUBLIC_URL and not WEBHOOK_SECRET:
+        logger.error("❌ PUBLIC_URL задан без WEBHOOK_SECRET - Telegram-бот не запущен")
+    elif PUBLIC_URL and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        logger.error("❌ Telegram-бот работает только в одном процессе (WEB_CONCURRENCY=1) - не запущен")
+    elif PUBLIC_URL:
+        import bot_simple_api
+        try:
+            await asyncio.wait_for(
+                bot_simple_api.start(f"{PUBLIC_URL.rstrip('/')}/tg/webhook"), BOT_START_TIMEOUT
+            )
+            telegram_bot = bot_simple_api
+        except Exception as e:
+            logger.error("❌ Ошибка запуска Telegram-бота: %r", e)
+            await bot_simple_api.stop()
+    
+    yield
+    
+    if telegram_bot is not None:
+        await telegram_bot.stop()
+    if pg_pool is not None:
+        await pg_pool.close()
+    await engine.dispose()
 
 # Создание FastAPI приложения
 app = FastAPI(
     title="🏸 Badminton Rating API",
     description="API для приложения бадминтон рейтинга",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS настройки
@@ -43,8 +142,50 @@ DATABASE_URL = os.getenv(
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Кэш подготовленных выражений asyncpg: горячие запросы не разбираются сервером заново.
+# За PgBouncer в режиме transaction (pgbouncer.ini) выражения не переживают смену серверного
+# соединения - кэш выключается, а безымянные выражения получают уникальные имена
+PGBOUNCER = os.getenv("PGBOUNCER", "").lower() in ("1", "true", "yes")
+STATEMENT_CACHE_SIZE = 0 if PGBOUNCER else 256
+
+DB_CONNECT_ARGS = {
+    "statement_cache_size": STATEMENT_CACHE_SIZE,
+    "prepared_statement_cache_size": STATEMENT_CACHE_SIZE
+}
+if PGBOUNCER:
+    DB_CONNECT_ARGS["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+
+# asyncpg не принимает sslmode из URL (его добавляют Vercel и другие хостинги) - переносим в ssl
+ENGINE_URL = make_url(DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1))
+if "sslmode" in ENGINE_URL.query:
+    DB_CONNECT_ARGS["ssl"] = ENGINE_URL.query["sslmode"]
+    ENGINE_URL = ENGINE_URL.difference_update_query(["sslmode"])
+
+# Бюджет соединений с Postgres на один процесс: пул SQLAlchemy (с переполнением) и пул asyncpg.
+# Процессов uvicorn не больше DB_MAX_CONNECTIONS // DB_CONNECTIONS_PER_WORKER (без PgBouncer)
+DB_POOL_SIZE = 20
+DB_MAX_OVERFLOW = 10
+RAW_POOL_MIN_SIZE = 5
+RAW_POOL_MAX_SIZE = 20
+DB_CONNECTIONS_PER_WORKER = DB_POOL_SIZE + DB_MAX_OVERFLOW + RAW_POOL_MAX_SIZE
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "100"))  # max_connections сервера Postgres
+
+# Асинхронный драйвер asyncpg и пул соединений, переиспользуемых между запросами
+engine = create_async_engine(
+    ENGINE_URL,
+    connect_args=DB_CONNECT_ARGS,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    echo=False
+)
+async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+# Пул asyncpg без ORM (создается в lifespan); None - список комнат читается через ORM
+pg_pool = None
 Base = declarative_base()
 
 # Модели базы данных
@@ -60,8 +201,8 @@ class Player(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Связи
-    rooms = relationship("Room", back_populates="creator")
-    memberships = relationship("RoomMember", back_populates="player")
+    rooms = relationship("Room", back_populates="creator", lazy="raise")
+    memberships = relationship("RoomMember", back_populates="player", lazy="raise")
 
 class Room(Base):
     __tablename__ = "rooms"
@@ -74,36 +215,61 @@ class Room(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Связи
-    creator = relationship("Player", back_populates="rooms")
-    members = relationship("RoomMember", back_populates="room")
+    creator = relationship("Player", back_populates="rooms", lazy="raise")
+    # Участники удаляются самой БД (ON DELETE CASCADE), без загрузки в сессию
+    members = relationship("RoomMember", back_populates="room", lazy="raise", passive_deletes=True)
+    
+    # Частичный индекс: список активных комнат не сканирует всю таблицу
+    __table_args__ = (
+        Index("rooms_active_idx", "id", postgresql_where=text("is_active")),
+    )
 
 class RoomMember(Base):
     __tablename__ = "room_members"
     
     id = Column(Integer, primary_key=True, index=True)
-    room_id = Column(Integer, ForeignKey("rooms.id"))
-    player_id = Column(Integer, ForeignKey("players.id"))
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"))
+    player_id = Column(Integer, ForeignKey("players.id"), index=True)
     is_leader = Column(Boolean, default=False)
     joined_at = Column(DateTime, default=datetime.utcnow)
     
     # Связи
-    room = relationship("Room", back_populates="members")
-    player = relationship("Player", back_populates="memberships")
+    room = relationship("Room", back_populates="members", lazy="raise")
+    player = relationship("Player", back_populates="memberships", lazy="raise")
+    
+    # Покрывающий индекс для выборки участников по room_id (заменяет отдельный индекс по room_id)
+    __table_args__ = (
+        Index("ix_members_room_player", "room_id", "player_id", "is_leader"),
+    )
 
-# Создание таблиц
-try:
-    Base.metadata.create_all(bind=engine)
-    logger.info("✅ Таблицы созданы успешно")
-except Exception as e:
-    logger.error(f"❌ Ошибка создания таблиц: {e}")
+# Загрузка комнаты вместе с создателем и участниками за фиксированное число запросов;
+# любые другие связи запрещены, чтобы случайные N+1 сразу давали ошибку
+ROOM_LOAD_OPTIONS = (
+    joinedload(Room.creator),
+    selectinload(Room.members).joinedload(RoomMember.player),
+    raiseload("*"),
+)
+
+# Ключи кэша комнат строятся только из id: сессия БД среди аргументов не должна в них попадать
+ROOMS_CACHE_NAMESPACE = "rooms"
+
+def rooms_list_key_builder(func, namespace="", **kwargs):
+    return f"{namespace}:list"
+
+def room_key_builder(func, namespace="", **kwargs):
+    return f"{namespace}:{kwargs['kwargs']['room_id']}"
+
+async def invalidate_rooms_cache():
+    """Сбрасывает закэшированные списки и детали комнат"""
+    await FastAPICache.clear(namespace=ROOMS_CACHE_NAMESPACE)
+
+# Последний успешно собранный список комнат - отдается, если БД недоступна
+last_rooms_response = None
 
 # Dependency для получения сессии БД
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with async_session_maker() as db:
         yield db
-    finally:
-        db.close()
 
 # Pydantic модели
 class PlayerCreate(BaseModel):
@@ -120,8 +286,7 @@ class PlayerResponse(BaseModel):
     username: Optional[str]
     rating: int
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class RoomCreate(BaseModel):
     name: str
@@ -134,22 +299,86 @@ class RoomMemberResponse(BaseModel):
     is_leader: bool
     joined_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class RoomResponse(BaseModel):
     id: int
     name: str
     creator_id: int
-    creator_full_name: str
+    creator: PlayerResponse
     max_players: int
-    member_count: int
     is_active: bool
     created_at: datetime
     members: List[RoomMemberResponse] = []
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+    
+    # Производные поля считаются при сериализации, а не в каждом обработчике
+    @computed_field
+    @property
+    def creator_full_name(self) -> str:
+        return f"{self.creator.first_name} {self.creator.last_name or ''}".strip()
+    
+    @computed_field
+    @property
+    def member_count(self) -> int:
+        return len(self.members)
+
+# Список активных комнат одним запросом: строки собираются в ответы без ORM и валидации
+ACTIVE_ROOMS_SQL = """
+SELECT r.id, r.name, r.creator_id, r.max_players, r.is_active, r.created_at,
+       c.telegram_id AS c_tg, c.first_name AS c_fn, c.last_name AS c_ln, c.username AS c_un, c.rating AS c_rating,
+       rm.id AS m_id, rm.is_leader, rm.joined_at,
+       p.id AS p_id, p.telegram_id, p.first_name AS p_fn, p.last_name AS p_ln, p.username, p.rating
+FROM rooms r
+JOIN players c ON c.id = r.creator_id
+LEFT JOIN room_members rm ON rm.room_id = r.id
+LEFT JOIN players p ON p.id = rm.player_id
+WHERE r.is_active
+ORDER BY r.id, rm.id
+"""
+
+async def fetch_active_rooms():
+    """Получает активные комнаты с участниками через пул asyncpg"""
+    rows = await pg_pool.fetch(ACTIVE_ROOMS_SQL)
+    
+    rooms = {}
+    for row in rows:
+        room = rooms.get(row["id"])
+        if room is None:
+            room = rooms[row["id"]] = RoomResponse.model_construct(
+                id=row["id"],
+                name=row["name"],
+                creator_id=row["creator_id"],
+                creator=PlayerResponse.model_construct(
+                    id=row["creator_id"],
+                    telegram_id=row["c_tg"],
+                    first_name=row["c_fn"],
+                    last_name=row["c_ln"],
+                    username=row["c_un"],
+                    rating=row["c_rating"]
+                ),
+                max_players=row["max_players"],
+                is_active=row["is_active"],
+                created_at=row["created_at"],
+                members=[]
+            )
+        if row["m_id"] is not None:
+            room.members.append(RoomMemberResponse.model_construct(
+                id=row["m_id"],
+                player=PlayerResponse.model_construct(
+                    id=row["p_id"],
+                    telegram_id=row["telegram_id"],
+                    first_name=row["p_fn"],
+                    last_name=row["p_ln"],
+                    username=row["username"],
+                    rating=row["rating"]
+                ),
+                is_leader=row["is_leader"],
+                joined_at=row["joined_at"]
+            ))
+    
+    return list(rooms.values())
 
 # API Endpoints
 @app.get("/")
@@ -165,50 +394,46 @@ async def health():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
 @app.post("/players/", response_model=PlayerResponse)
-async def create_or_get_player(player: PlayerCreate, db: Session = Depends(get_db)):
+async def create_or_get_player(player: PlayerCreate, db: AsyncSession = Depends(get_db)):
     """Создает или получает игрока по telegram_id"""
     try:
-        # Проверяем, существует ли игрок
-        existing_player = db.query(Player).filter(Player.telegram_id == player.telegram_id).first()
-        
-        if existing_player:
-            # Обновляем данные если они изменились
-            existing_player.first_name = player.first_name
-            if player.last_name:
-                existing_player.last_name = player.last_name
-            if player.username:
-                existing_player.username = player.username
-            db.commit()
-            db.refresh(existing_player)
-            return existing_player
-        
-        # Создаем нового игрока
-        new_player = Player(**player.dict())
-        db.add(new_player)
-        db.commit()
-        db.refresh(new_player)
+        # Один запрос: вставка или обновление по уникальному telegram_id;
+        # пустые фамилия и username не затирают сохраненные значения
+        stmt = insert(Player).values(**player.model_dump())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Player.telegram_id],
+            set_={
+                "first_name": stmt.excluded.first_name,
+                "last_name": func.coalesce(func.nullif(stmt.excluded.last_name, ""), Player.last_name),
+                "username": func.coalesce(func.nullif(stmt.excluded.username, ""), Player.username),
+            }
+        ).returning(Player)
+        saved_player = (await db.execute(stmt)).scalar_one()
+        await db.commit()
         
-        logger.info(f"✅ Создан новый игрок: {new_player.first_name} (ID: {new_player.telegram_id})")
-        return new_player
+        logger.info("✅ Игрок сохранен: %s (ID: %s)", saved_player.first_name, saved_player.telegram_id)
+        return saved_player
         
     except Exception as e:
-        logger.error(f"❌ Ошибка создания игрока: {e}")
+        logger.error("❌ Ошибка создания игрока: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/players/{telegram_id}", response_model=PlayerResponse)
-async def get_player(telegram_id: int, db: Session = Depends(get_db)):
+async def get_player(telegram_id: int, db: AsyncSession = Depends(get_db)):
     """Получает игрока по telegram_id"""
-    player = db.query(Player).filter(Player.telegram_id == telegram_id).first()
+    result = await db.execute(select(Player).where(Player.telegram_id == telegram_id).options(raiseload("*")))
+    player = result.scalar_one_or_none()
     if not player:
         raise HTTPException(status_code=404, detail="Игрок не найден")
     return player
 
 @app.post("/rooms/", response_model=RoomResponse)
-async def create_room(room: RoomCreate, db: Session = Depends(get_db)):
+async def create_room(room: RoomCreate, db: AsyncSession = Depends(get_db)):
     """Создает новую комнату"""
     try:
         # Находим игрока-создателя
-        creator = db.query(Player).filter(Player.telegram_id == room.creator_telegram_id).first()
+        result = await db.execute(select(Player).where(Player.telegram_id == room.creator_telegram_id))
+        creator = result.scalar_one_or_none()
         if not creator:
             raise HTTPException(status_code=404, detail="Создатель комнаты не найден")
         
@@ -219,8 +444,8 @@ async def create_room(room: RoomCreate, db: Session = Depends(get_db)):
             max_players=room.max_players
         )
         db.add(new_room)
-        db.commit()
-        db.refresh(new_room)
+        # flush получает id комнаты без отдельного коммита
+        await db.flush()
         
         # Добавляем создателя как участника и лидера
         room_member = RoomMember(
@@ -229,141 +454,159 @@ async def create_room(room: RoomCreate, db: Session = Depends(get_db)):
             is_leader=True
         )
         db.add(room_member)
-        db.commit()
+        await db.commit()
         
-        # Формируем ответ
-        creator_full_name = f"{creator.first_name} {creator.last_name or ''}".strip()
+        # Формируем ответ: связи новой комнаты не загружены, создатель уже есть в сессии
+        result = RoomResponse.model_validate({
+            "id": new_room.id,
+            "name": new_room.name,
+            "creator_id": new_room.creator_id,
+            "creator": creator,
+            "max_players": new_room.max_players,
+            "is_active": new_room.is_active,
+            "created_at": new_room.created_at,
+            "members": [{
+                "id": room_member.id,
+                "player": creator,
+                "is_leader": True,
+                "joined_at": room_member.joined_at
+            }]
+        })
         
-        result = RoomResponse(
-            id=new_room.id,
-            name=new_room.name,
-            creator_id=new_room.creator_id,
-            creator_full_name=creator_full_name,
-            max_players=new_room.max_players,
-            member_count=1,
-            is_active=new_room.is_active,
-            created_at=new_room.created_at,
-            members=[RoomMemberResponse(
-                id=room_member.id,
-                player=creator,
-                is_leader=True,
-                joined_at=room_member.joined_at
-            )]
-        )
-        
-        logger.info(f"✅ Создана комната: {new_room.name} (ID: {new_room.id})")
+        await invalidate_rooms_cache()
+        logger.info("✅ Создана комната: %s (ID: %s)", new_room.name, new_room.id)
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ Ошибка создания комнаты: {e}")
+        logger.error("❌ Ошибка создания комнаты: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/rooms/", response_model=List[RoomResponse])
-async def get_rooms(db: Session = Depends(get_db)):
+@cache(expire=10, namespace=ROOMS_CACHE_NAMESPACE, key_builder=rooms_list_key_builder)
+async def get_rooms(db: AsyncSession = Depends(get_db)):
     """Получает список всех активных комнат"""
+    global last_rooms_response
     try:
-        rooms = db.query(Room).filter(Room.is_active == True).all()
+        if pg_pool is not None:
+            result = await fetch_active_rooms()
+            logger.info("✅ Найдено комнат: %d", len(result))
+            last_rooms_response = result
+            return result
         
-        result = []
-        for room in rooms:
-            # Получаем всех участников комнаты
-            members = db.query(RoomMember).filter(RoomMember.room_id == room.id).all()
-            
-            # Формируем полное имя создателя
-            creator_full_name = f"{room.creator.first_name} {room.creator.last_name or ''}".strip()
-            
-            room_response = RoomResponse(
-                id=room.id,
-                name=room.name,
-                creator_id=room.creator_id,
-                creator_full_name=creator_full_name,
-                max_players=room.max_players,
-                member_count=len(members),
-                is_active=room.is_active,
-                created_at=room.created_at,
-                members=[
-                    RoomMemberResponse(
-                        id=member.id,
-                        player=member.player,
-                        is_leader=member.is_leader,
-                        joined_at=member.joined_at
-                    ) for member in members
-                ]
-            )
-            result.append(room_response)
+        rooms = (await db.execute(
+            select(Room).where(Room.is_active == True).options(*ROOM_LOAD_OPTIONS)
+        )).unique().scalars().all()
+        
+        result = [RoomResponse.model_validate(room) for room in rooms]
         
-        logger.info(f"✅ Найдено комнат: {len(result)}")
+        logger.info("✅ Найдено комнат: %d", len(result))
+        last_rooms_response = result
         return result
         
     except Exception as e:
-        logger.error(f"❌ Ошибка получения комнат: {e}")
+        logger.error("❌ Ошибка получения комнат: %s", e)
+        if last_rooms_response is not None:
+            logger.warning("⚠️ Отдаем последний сохраненный список комнат")
+            return last_rooms_response
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/rooms/{room_id}", response_model=RoomResponse)
-async def get_room(room_id: int, db: Session = Depends(get_db)):
+@cache(expire=5, namespace=ROOMS_CACHE_NAMESPACE, key_builder=room_key_builder)
+async def get_room(room_id: int, db: AsyncSession = Depends(get_db)):
     """Получает детали комнаты по ID"""
     try:
-        room = db.query(Room).filter(Room.id == room_id).first()
+        room = (await db.execute(
+            select(Room).where(Room.id == room_id).options(*ROOM_LOAD_OPTIONS)
+        )).unique().scalar_one_or_none()
         if not room:
             raise HTTPException(status_code=404, detail="Комната не найдена")
         
-        # Получаем всех участников комнаты
-        members = db.query(RoomMember).filter(RoomMember.room_id == room_id).all()
-        
-        # Формируем полное имя создателя
-        creator_full_name = f"{room.creator.first_name} {room.creator.last_name or ''}".strip()
-        
-        result = RoomResponse(
-            id=room.id,
-            name=room.name,
-            creator_id=room.creator_id,
-            creator_full_name=creator_full_name,
-            max_players=room.max_players,
-            member_count=len(members),
-            is_active=room.is_active,
-            created_at=room.created_at,
-            members=[
-                RoomMemberResponse(
-                    id=member.id,
-                    player=member.player,
-                    is_leader=member.is_leader,
-                    joined_at=member.joined_at
-                ) for member in members
-            ]
-        )
+        result = RoomResponse.model_validate(room)
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ Ошибка получения комнаты {room_id}: {e}")
+        logger.error("❌ Ошибка получения комнаты %s: %s", room_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/rooms/{room_id}")
-async def delete_room(room_id: int, db: Session = Depends(get_db)):
+async def delete_room(room_id: int, db: AsyncSession = Depends(get_db)):
     """Удаляет комнату"""
     try:
-        room = db.query(Room).filter(Room.id == room_id).first()
-        if not room:
+        # Участники удаляются каскадом вместе с комнатой
+        result = await db.execute(delete(Room).where(Room.id == room_id))
+        if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Комната не найдена")
+        await db.commit()
+        await invalidate_rooms_cache()
         
-        # Удаляем всех участников
-        db.query(RoomMember).filter(RoomMember.room_id == room_id).delete()
-        
-        # Удаляем комнату
-        db.delete(room)
-        db.commit()
-        
-        logger.info(f"✅ Комната {room_id} удалена")
+        logger.info("✅ Комната %s удалена", room_id)
         return {"message": "Комната успешно удалена"}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ Ошибка удаления комнаты {room_id}: {e}")
+        logger.error("❌ Ошибка удаления комнаты %s: %s", room_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/tg/webhook")
+async def telegram_webhook(request: Request):
+    """Принимает обновление от Telegram и сразу отвечает; обработка идет в очередях бота"""
+    if telegram_bot is None:
+        raise HTTPException(status_code=404, detail="Бот не запущен")
+    if not secrets.compare_digest(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), WEBHOOK_SECRET):
+        raise HTTPException(status_code=403, detail="Неверный секрет вебхука")
+    
+    # Очередь переполнена - отвечаем 503, и Telegram доставит обновление повторно позже
+    update = await request.json()
+    if not telegram_bot.enqueue_update(update):
+        logger.warning("⚠️ Очередь бота переполнена, обновление %s будет доставлено повторно", update.get("update_id"))
+        raise HTTPException(status_code=503, detail="Очередь бота переполнена")
+    return {"ok": True}
+
 # Для совместимости с Vercel
 def handler(request, context):
     return app(request, context)
 
+def web_workers():
+    """Число процессов uvicorn: несколько - только когда общее состояние вынесено из процесса"""
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    if workers <= 1:
+        return 1
+    # Очереди чатов бота и вебхук живут в одном процессе, иначе порядок обновлений чата теряется
+    if PUBLIC_URL:
+        logger.warning("⚠️ Telegram-бот работает только в одном процессе - запускаем 1 воркер")
+        return 1
+    # InMemoryBackend у каждого процесса свой: сброс кэша комнат дошел бы только до одного
+    if not REDIS_URL:
+        logger.warning("⚠️ Без REDIS_URL кэш комнат не общий - запускаем 1 воркер")
+        return 1
+    if not PGBOUNCER:
+        limit = max(1, DB_MAX_CONNECTIONS // DB_CONNECTIONS_PER_WORKER)
+        if workers > limit:
+            logger.warning("⚠️ Бюджет соединений Postgres (%d по %d на процесс) - запускаем воркеров: %d",
+                           DB_MAX_CONNECTIONS, DB_CONNECTIONS_PER_WORKER, limit)
+            return limit
+    return workers
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Выбранное число процессов - единственный источник правды: lifespan каждого процесса читает его же
+    workers = web_workers()
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    # Несколько процессов на uvloop + httptools; каждый процесс импортирует приложение заново
+    # и держит свои пулы соединений (engine и asyncpg подключаются лениво / в lifespan)
+    uvicorn.run(
+        "api.main:app",
+        app_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        host="0.0.0.0",
+        port=8000,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        log_level="warning"
+    )
@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import requests
+import asyncio
+import aiohttp
 import json
-import time
 import os
 from dotenv import load_dotenv
 
@@ -25,12 +25,42 @@ def _load_admin_ids():
 
 ADMIN_IDS = _load_admin_ids()
 
-def send_message(chat_id, text, reply_markup=None):
-    """Отправка сообщения в чат"""
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-    
+# Параллельная обработка обновлений: UPDATE_WORKERS обработчиков, у каждого своя очередь.
+# Обновления одного чата всегда попадают в одну очередь и обрабатываются по порядку
+UPDATE_WORKERS = 8
+UPDATE_QUEUE_SIZE = 200
+
+# Обновления приходят вебхуком: Telegram сам присылает их на POST /tg/webhook API-приложения (api/main.py)
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+# Общая HTTP-сессия бота: соединения с api.telegram.org держатся открытыми
+# и переиспользуются между запросами. Создается в start()
+session = None
+queues = []
+workers = []
+
+# Ограничение на любой запрос к Bot API: зависший api.telegram.org не должен держать запуск и обработчики
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+async def post_json(method, data, timeout=REQUEST_TIMEOUT):
+    """POST-запрос к Bot API; возвращает (status, тело ответа)"""
+    url = f"https://api.telegram.org/bot{BOT_TOKEN}/{method}"
+    async with session.post(url, json=data, timeout=timeout) as response:
+        # Тело дочитывается полностью, чтобы соединение вернулось в пул
+        body = await response.read()
+        return response.status, body
+
+async def post_body(method, body):
+    """POST-запрос к Bot API с готовым JSON-телом; возвращает (status, тело ответа)"""
+    url = f"https://api.telegram.org/bot{BOT_TOKEN}/{method}"
+    async with session.post(url, data=body, headers={"Content-Type": "application/json"}) as response:
+        return response.status, await response.read()
+
+def build_message_payload(text, reply_markup=None):
+    """Тело sendMessage, сериализованное заранее: chat_id подставляется в байты при отправке"""
     data = {
-        "chat_id": chat_id,
+        "chat_id": "__CHAT_ID__",
         "text": text,
         "parse_mode": "HTML"
     }
@@ -38,22 +68,32 @@ def send_message(chat_id, text, reply_markup=None):
     if reply_markup:
         data["reply_markup"] = reply_markup
     
+    return json.dumps(data, ensure_ascii=False).encode().replace(b'"__CHAT_ID__"', b"__CHAT_ID__")
+
+async def send_message(chat_id, text, reply_markup=None):
+    """Отправка сообщения в чат"""
+    return await send_payload(build_message_payload(text, reply_markup), chat_id)
+
+async def send_payload(payload, chat_id, first_name=None):
+    """Отправка заранее собранного сообщения; first_name заменяет __NAME__ в тексте"""
+    body = payload.replace(b"__CHAT_ID__", str(chat_id).encode())
+    if first_name is not None:
+        body = body.replace(b"__NAME__", json.dumps(first_name, ensure_ascii=False)[1:-1].encode())
+    
     try:
-        response = requests.post(url, json=data)
-        if response.status_code == 200:
+        status, _ = await post_body("sendMessage", body)
+        if status == 200:
             print(f"✅ Сообщение отправлено успешно")
             return True
         else:
-            print(f"❌ Ошибка отправки: {response.status_code}")
+            print(f"❌ Ошибка отправки: {status}")
             return False
     except Exception as e:
         print(f"❌ Ошибка отправки: {str(e)}")
         return False
 
-def setup_bot_commands():
+async def setup_bot_commands():
     """Настройка команд бота"""
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/setMyCommands"
-    
     commands = [
         {"command": "start", "description": "Запустить бота"}
     ]
@@ -63,78 +103,80 @@ def setup_bot_commands():
     }
     
     try:
-        response = requests.post(url, json=data)
-        if response.status_code == 200:
+        status, _ = await post_json("setMyCommands", data)
+        if status == 200:
             print("✅ Команды бота настроены")
             return True
         else:
-            print(f"❌ Ошибка настройки команд: {response.status_code}")
+            print(f"❌ Ошибка настройки команд: {status}")
             return False
     except Exception as e:
         print(f"❌ Ошибка настройки команд: {str(e)}")
         return False
 
-def handle_start_command(chat_id, first_name):
-    """Обработка команды /start"""
-    print(f"🚀 Обрабатываю команду /start для {first_name}")
-    
-    # Создаем клавиатуру с кнопками
-    keyboard = {
-        "inline_keyboard": [
-            [
-                {
-                    "text": "✏️ Изменить инициалы",
-                    "callback_data": "change_initials"
+# Ответы бота не зависят от запроса (кроме chat_id и имени) - собираются один раз при импорте
+START_KEYBOARD = {
+    "inline_keyboard": [
+        [
+            {
+                "text": "✏️ Изменить инициалы",
+                "callback_data": "change_initials"
+            }
+        ],
+        [
+            {
+                "text": "🏸 Начать игру",
+                "web_app": {
+                    "url": MINI_APP_URL
                 }
-            ],
-            [
-                {
-                    "text": "🏸 Начать игру",
-                    "web_app": {
-                        "url": MINI_APP_URL
-                    }
-                }
-            ]
+            }
         ]
-    }
-    
-    welcome_text = f"""
-Привет, {first_name}! 👋
+    ]
+}
+
+START_PAYLOAD = build_message_payload("""
+Привет, __NAME__! 👋
 
 Добро пожаловать в систему рейтинга бадминтона!
 
 Нажмите на кнопку "Начать игру" чтобы открыть Mini App.
-    """.strip()
+""".strip(), START_KEYBOARD)
+
+CHANGE_INITIALS_PAYLOAD = build_message_payload("""
+Для изменения инициалов, пожалуйста, обратитесь к администратору.
+
+Или используйте Mini App для управления профилем.
+""".strip())
+
+ADMIN_DENIED_PAYLOAD = build_message_payload("❌ У вас нет прав для выполнения этой команды.")
+ROOMS_CLEARED_PAYLOAD = build_message_payload("✅ Все комнаты успешно очищены и расформированы.")
+
+async def handle_start_command(chat_id, first_name):
+    """Обработка команды /start"""
+    print(f"🚀 Обрабатываю команду /start для {first_name}")
     
-    return send_message(chat_id, welcome_text, keyboard)
+    return await send_payload(START_PAYLOAD, chat_id, first_name)
 
-def handle_callback_query(chat_id, callback_data):
+async def handle_callback_query(chat_id, callback_data):
     """Обработка callback запросов от кнопок"""
     if callback_data == "change_initials":
         # Здесь можно добавить логику для изменения инициалов
-        response_text = """
-Для изменения инициалов, пожалуйста, обратитесь к администратору.
-
-Или используйте Mini App для управления профилем.
-        """.strip()
-        
-        return send_message(chat_id, response_text)
+        return await send_payload(CHANGE_INITIALS_PAYLOAD, chat_id)
     
     return False
 
-def handle_admin_clear_rooms(chat_id):
+async def handle_admin_clear_rooms(chat_id):
     """Админская команда очистки комнат"""
     print(f"🗑️ Админская команда очистки комнат от {chat_id}")
     
     if chat_id not in ADMIN_IDS:
-        return send_message(chat_id, "❌ У вас нет прав для выполнения этой команды.")
+        return await send_payload(ADMIN_DENIED_PAYLOAD, chat_id)
     
     # Здесь можно добавить вызов API для очистки комнат
     # Пока просто отправляем сообщение об успехе
-    success_message = "✅ Все комнаты успешно очищены и расформированы."
-    return send_message(chat_id, success_message)
+    return await send_payload(ROOMS_CLEARED_PAYLOAD, chat_id)
 
-def process_update(update):
+async def process_update(update):
     """Обработка обновления от Telegram"""
     try:
         # Обработка сообщений
@@ -147,9 +189,9 @@ def process_update(update):
                 text = message["text"]
                 
                 if text == "/start":
-                    return handle_start_command(chat_id, first_name)
+                    return await handle_start_command(chat_id, first_name)
                 elif text == "/admin_clear_rooms":
-                    return handle_admin_clear_rooms(chat_id)
+                    return await handle_admin_clear_rooms(chat_id)
                 else:
                     # Игнорируем все остальные команды
                     return True
@@ -160,7 +202,7 @@ def process_update(update):
             chat_id = callback_query["message"]["chat"]["id"]
             callback_data = callback_query["data"]
             
-            return handle_callback_query(chat_id, callback_data)
+            return await handle_callback_query(chat_id, callback_data)
         
         return True
         
@@ -168,74 +210,105 @@ def process_update(update):
         print(f"❌ Ошибка обработки обновления: {str(e)}")
         return False
 
-def get_updates(offset=None):
-    """Получение обновлений от Telegram"""
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/getUpdates"
-    
-    params = {
-        "timeout": 30,
-        "allowed_updates": ["message", "callback_query"]
+async def set_webhook(url):
+    """Регистрация вебхука: Telegram будет присылать обновления на url"""
+    data = {
+        "url": url,
+        "allowed_updates": ALLOWED_UPDATES
     }
     
-    if offset:
-        params["offset"] = offset
+    if WEBHOOK_SECRET:
+        data["secret_token"] = WEBHOOK_SECRET
     
     try:
-        response = requests.get(url, params=params, timeout=35)
-        if response.status_code == 200:
-            return response.json()
+        status, _ = await post_json("setWebhook", data)
+        if status == 200:
+            print(f"✅ Вебхук установлен: {url}")
+            return True
         else:
-            print(f"❌ Ошибка получения обновлений: {response.status_code}")
-            return None
+            print(f"❌ Ошибка установки вебхука: {status}")
+            return False
     except Exception as e:
-        print(f"❌ Ошибка получения обновлений: {str(e)}")
-        return None
+        print(f"❌ Ошибка установки вебхука: {str(e)}")
+        return False
+
+def update_chat_id(update):
+    """id чата, к которому относится обновление (0, если чата нет)"""
+    if "message" in update:
+        return update["message"].get("chat", {}).get("id", 0)
+    if "callback_query" in update:
+        return update["callback_query"].get("message", {}).get("chat", {}).get("id", 0)
+    return 0
+
+def enqueue_update(update):
+    """Кладет обновление из вебхука в очередь его чата; False, если очередь переполнена"""
+    queue = queues[update_chat_id(update) % len(queues)]
+    try:
+        queue.put_nowait(update)
+        return True
+    except asyncio.QueueFull:
+        return False
+
+async def process_chat_updates(updates):
+    """Обрабатывает обновления одного чата по порядку"""
+    for update in updates:
+        if not await process_update(update):
+            print(f"❌ Ошибка обработки обновления {update['update_id']}")
 
-def main():
-    """Основная функция бота"""
+async def update_worker(queue):
+    """Обрабатывает обновления из своей очереди пачками: разные чаты параллельно, один чат по порядку"""
+    while True:
+        batch = [await queue.get()]
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        
+        chats = {}
+        for update in batch:
+            chats.setdefault(update_chat_id(update), []).append(update)
+        
+        try:
+            await asyncio.gather(*(process_chat_updates(updates) for updates in chats.values()))
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+async def start(webhook_url):
+    """Запуск бота внутри API-приложения: сессия, команды, вебхук и обработчики"""
+    global session
+    
     print("🤖 Запуск простого Telegram бота...")
     print(f"📱 Токен: {BOT_TOKEN[:20]}...")
     print(f"🌐 Mini App URL: {MINI_APP_URL}")
     print("=" * 50)
     
+    connector = aiohttp.TCPConnector(limit=50, keepalive_timeout=75)
+    session = aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT)
+    
     # Настраиваем команды бота
-    if not setup_bot_commands():
+    if not await setup_bot_commands():
         print("❌ Не удалось настроить команды бота")
-        return
+    
+    queues[:] = [asyncio.Queue(maxsize=UPDATE_QUEUE_SIZE) for _ in range(UPDATE_WORKERS)]
+    workers[:] = [asyncio.create_task(update_worker(queue)) for queue in queues]
+    
+    # Без вебхука обновления не придут - запуск считается неудачным
+    if not await set_webhook(webhook_url):
+        raise RuntimeError("не удалось установить вебхук")
     
     print("✅ Бот успешно запущен!")
     print("📱 Отправьте /start в Telegram боту @GoBadmikAppBot")
     print("=" * 50)
-    
-    offset = None
-    
-    while True:
-        try:
-            print("🔄 Бот работает... Нажмите Ctrl+C для остановки")
-            
-            # Получаем обновления
-            updates_response = get_updates(offset)
-            
-            if updates_response and "result" in updates_response:
-                updates = updates_response["result"]
-                
-                for update in updates:
-                    update_id = update["update_id"]
-                    offset = update_id + 1
-                    
-                    # Обрабатываем обновление
-                    if not process_update(update):
-                        print(f"❌ Ошибка обработки обновления {update_id}")
-            
-            # Небольшая пауза между запросами
-            time.sleep(1)
-            
-        except KeyboardInterrupt:
-            print("\n🛑 Бот остановлен пользователем")
-            break
-        except Exception as e:
-            print(f"❌ Критическая ошибка: {str(e)}")
-            time.sleep(5)  # Пауза перед повторной попыткой
+
+async def stop():
+    """Остановка обработчиков и закрытие HTTP-сессии"""
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    workers.clear()
+    if session is not None:
+        await session.close()
 
 if __name__ == "__main__":
-    main()
+    # Бот работает внутри API-приложения: вебхук регистрируется при его запуске (нужен PUBLIC_URL)
+    import uvicorn
+    uvicorn.run("api.main:app", host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
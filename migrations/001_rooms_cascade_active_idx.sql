@@ -0,0 +1,8 @@
+-- Каскадное удаление участников вместе с комнатой
+ALTER TABLE room_members DROP CONSTRAINT IF EXISTS room_members_room_id_fkey;
+ALTER TABLE room_members
+    ADD CONSTRAINT room_members_room_id_fkey
+    FOREIGN KEY (room_id) REFERENCES rooms(id) ON DELETE CASCADE;
+
+-- Частичный индекс для списка активных комнат (вне транзакции)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS rooms_active_idx ON rooms(id) WHERE is_active;
@@ -0,0 +1,3 @@
+-- Индексы внешних ключей room_members (Postgres не создает их автоматически)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_room_members_player_id ON room_members(player_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_members_room_player ON room_members(room_id, player_id, is_leader);